@@ -1,23 +1,21 @@
-import logging
 import os
+from pathlib import Path
 
 from dotenv import load_dotenv
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
-logger = logging.getLogger(__name__)
-
-
 load_dotenv()
 
+AI_BACKENDS = frozenset({"openai", "openai_batch", "ollama"})
 AI_BACKEND = os.getenv("AI_BACKEND", "openai").lower()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-if AI_BACKEND == "openai" and not OPENAI_API_KEY:
+if AI_BACKEND not in AI_BACKENDS:
+    raise ValueError(
+        f"Unknown AI_BACKEND: {AI_BACKEND}. Must be 'ollama', 'openai' or 'openai_batch'.")
+
+if AI_BACKEND in ("openai", "openai_batch") and not OPENAI_API_KEY:
     raise ValueError(
         "OPENAI_API_KEY environment variable not set, but OpenAI backend selected.")
 
-logger.info(f"Using AI backend: {AI_BACKEND}")
+CACHE_DIR = Path.cwd() / "data"
+CACHE_DIR.mkdir(exist_ok=True)
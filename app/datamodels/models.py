@@ -1,3 +1,4 @@
+from types import MappingProxyType
 from typing import Optional
 from pydantic import BaseModel, Field
 
@@ -28,6 +29,12 @@ class WorkflowReqs(BaseModel):
         description="A concise explanation on why the prompt was given these scores")
 
 
+class GateAndReqs(BaseModel):
+    """Gate check and workflow extraction answered in a single pass"""
+    gate: ComparisonExtract = Field(description="Whether the prompt is a valid resume assistant request")
+    reqs: WorkflowReqs = Field(description="The workflow steps the prompt asks for")
+
+
 class JDScore(BaseModel):
     """Score the JD against the resume"""
     # description: str = Field(description="The job description")
@@ -36,11 +43,25 @@ class JDScore(BaseModel):
     explanation: str = Field(description="Explanation of suitability score")
 
 
+class JDScoreList(BaseModel):
+    """Scores for several JDs against the same resume, in the order the JDs were given"""
+    scores: list[JDScore] = Field(description="One score per job description, in order")
+
+
 class ResumeSuggestions(BaseModel):
     suggestions: str = Field(
         description="Suggestions on how to update the resume")
 
 
+class FullAnalysis(BaseModel):
+    """Score, gaps and edit suggestions produced in a single pass"""
+    score: JDScore = Field(description="Resume suitability score and explanation")
+    gaps: str = Field(
+        description="Bullet-point list of missing skills or experiences")
+    suggestions: ResumeSuggestions = Field(
+        description="Suggestions on how to update the resume")
+
+
 class ResumeDigest(BaseModel):
     """Summarize the resume"""
     summary: str = Field(description="Summary of the input resume")
@@ -53,3 +74,36 @@ class JobInfo(BaseModel):
         description="Assigned score by LLM", default=0)
     explanation: Optional[str] = Field(
         description="Short explanation as to why the score was given", default="None")
+
+
+def _strict_schema(node, defs: dict):
+    """
+    Rewrites a JSON schema into the subset accepted by OpenAI strict structured outputs.
+
+    Every object is closed and lists all of its properties as required, and a $ref that carries
+    sibling keywords (e.g. a field description) is inlined, since strict mode doesn't allow them.
+    """
+    if isinstance(node, list):
+        return [_strict_schema(item, defs) for item in node]
+    if not isinstance(node, dict):
+        return node
+    if "$ref" in node and len(node) > 1:
+        target = defs[node["$ref"].rsplit("/", 1)[-1]]
+        node = {**target, **{k: v for k, v in node.items() if k != "$ref"}}
+    if node.get("type") == "object":
+        node = {**node, "additionalProperties": False,
+                "required": list(node.get("properties", {}))}
+    return {k: _strict_schema(v, defs) for k, v in node.items()}
+
+
+def _response_schema(model: type[BaseModel]) -> dict:
+    schema = model.model_json_schema()
+    return _strict_schema(schema, schema.get("$defs", {}))
+
+
+# Schemas of the models LLMs are asked to fill in, generated once at import instead of on every request
+RESPONSE_SCHEMAS = MappingProxyType({
+    model: _response_schema(model)
+    for model in (ComparisonExtract, WorkflowReqs, GateAndReqs, JDScore, JDScoreList, ResumeSuggestions,
+                  FullAnalysis, ResumeDigest)
+})
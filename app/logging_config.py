@@ -0,0 +1,16 @@
+import logging
+import os
+
+
+def setup_logging() -> None:
+    """
+    Configures the root logger for the application.
+
+    Called once from the entry point; every other module just uses logging.getLogger(__name__).
+    The level can be overridden with the LOG_LEVEL environment variable.
+    """
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
@@ -0,0 +1,37 @@
+from functools import lru_cache
+import importlib
+from types import ModuleType
+
+# Scoring module implementing each AI backend, imported the first time that backend is used
+_BACKEND_MODULES = {
+    "openai": ".oa_models",
+    "openai_batch": ".oa_models",
+    "ollama": ".ollama_models",
+}
+# Entry points the workflow calls on whichever backend is selected
+REQUIRED_FUNCTIONS = (
+    "check_request", "extract_reqs", "check_and_extract_reqs", "extract_tailoring", "score_resume",
+    "summarize_gaps", "summarize_gaps_stream", "suggest_edits", "analyze_resume", "close_client",
+)
+
+
+@lru_cache(maxsize=None)
+def get_backend(name: str) -> ModuleType:
+    """
+    Returns the scoring module for an AI backend, importing it on first use.
+
+    Args:
+        name (str): One of the AI_BACKEND values.
+
+    Returns:
+        ModuleType: The module providing REQUIRED_FUNCTIONS for that backend.
+
+    Raises:
+        ImportError: If the backend module is missing any of REQUIRED_FUNCTIONS, so an incomplete
+                     backend fails before any LLM request instead of partway through a workflow.
+    """
+    module = importlib.import_module(_BACKEND_MODULES[name], __package__)
+    missing = [function for function in REQUIRED_FUNCTIONS if not hasattr(module, function)]
+    if missing:
+        raise ImportError(f"AI backend {name!r} ({module.__name__}) is missing: {', '.join(missing)}")
+    return module
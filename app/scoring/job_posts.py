@@ -1,9 +1,218 @@
+import asyncio
+from hashlib import blake2b
+from itertools import chain
+import logging
+import re
+from typing import AsyncIterator, Iterable, Optional
 
 from app.config import AI_BACKEND
-if AI_BACKEND == "openai":
-    from app.scoring.oa_models import score_resume, summarize_gaps, suggest_edits
-elif AI_BACKEND == "ollama":
-    from .ollama_models import score_resume, summarize_gaps
-else:
-    raise ValueError(
-        f"Unknown AI_BACKEND: {AI_BACKEND}. Must be 'ollama' or 'openai'.")
+from app.datamodels.models import JDScore, JobInfo
+from app.scoring.backends import get_backend
+
+logger = logging.getLogger(__name__)
+
+# The coroutines below leave the backend's pooled client open so repeated calls in one event loop reuse its
+# connections. Callers running their own loop should await close_client() before it ends.
+
+# Job descriptions scored per multi-JD request; larger groups start to lose accuracy and risk truncated replies
+MULTI_SCORE_SIZE = 8
+
+
+async def score_resume_batch(pairs: list[tuple[str, str]]) -> list[JDScore]:
+    """
+    Scores many (resume, job description) pairs.
+
+    With AI_BACKEND=openai_batch the pairs are sent through the OpenAI Batch API, which is
+    half the price but can take up to 24h. Otherwise they are scored concurrently in real time.
+
+    The backend's client is kept open for reuse within the running event loop; await close_client()
+    before that loop ends.
+
+    Args:
+        pairs (list[tuple[str, str]]): (resume_text, job_description) pairs to score.
+
+    Returns:
+        list[JDScore]: One score per pair, in input order.
+    """
+    if AI_BACKEND == "openai_batch":
+        from app.scoring.oa_batch import score_resume_batch as submit_score_batch
+        return await submit_score_batch(pairs)
+    models = get_backend(AI_BACKEND)
+    results = await asyncio.gather(*(models.score_resume(resume_text, job_description)
+                                     for resume_text, job_description in pairs),
+                                   return_exceptions=True)
+    scores = []
+    for result in results:
+        if isinstance(result, Exception):
+            # One failed posting shouldn't throw away the scores of all the others
+            logger.error("Failed to score resume: %s", result)
+            result = JDScore(score=-1, explanation="Comparison failed")
+        scores.append(result)
+    return scores
+
+
+async def close_client() -> None:
+    """Closes the pooled connections of the AI_BACKEND client for the running event loop."""
+    await get_backend(AI_BACKEND).close_client()
+
+
+def _fingerprint(job: JobInfo) -> bytes:
+    """Identifies a (resume, job description) pair, ignoring differences in whitespace."""
+    normalized = "\0".join(re.sub(r"\s+", " ", text.strip()) for text in (job.resume, job.description))
+    return blake2b(normalized.encode(), digest_size=16).digest()
+
+
+async def _score_grouped_by_resume(jobs: list[JobInfo]) -> list[JDScore]:
+    """Scores the jobs with score_resume_multi, sending each resume once per group of MULTI_SCORE_SIZE jobs."""
+    by_resume: dict[str, list[int]] = {}
+    for i, job in enumerate(jobs):
+        by_resume.setdefault(job.resume, []).append(i)
+    groups = [indices[start:start + MULTI_SCORE_SIZE]
+              for indices in by_resume.values()
+              for start in range(0, len(indices), MULTI_SCORE_SIZE)]
+    models = get_backend(AI_BACKEND)
+    results = await asyncio.gather(*(models.score_resume_multi(jobs[group[0]].resume,
+                                                        [jobs[i].description for i in group])
+                                     for group in groups))
+    scores: list[JDScore] = [None] * len(jobs)
+    for group, group_scores in zip(groups, results):
+        for i, score in zip(group, group_scores):
+            scores[i] = score
+    return scores
+
+
+def score_job_posts(jobs: list[JobInfo], score_threshold: Optional[float] = None) -> list[JobInfo]:
+    """
+    Scores each job posting against the resume it was paired with, from synchronous code.
+
+    Runs ascore_job_posts in its own event loop with asyncio.run and closes the backend's client
+    before returning, so it can't be called from inside a running loop; await ascore_job_posts there.
+
+    Args:
+        jobs (list[JobInfo]): Job postings with their description and resume filled in.
+        score_threshold (Optional[float]): Postings at or below this score don't get an explanation.
+                                           Defaults to None, which explains every posting.
+
+    Returns:
+        list[JobInfo]: The same jobs, in order, with score and explanation set. Postings that
+                       could not be scored get a score of -1.
+    """
+    async def score_and_close() -> list[JobInfo]:
+        try:
+            return await ascore_job_posts(jobs, score_threshold)
+        finally:
+            await close_client()
+
+    return asyncio.run(score_and_close())
+
+
+async def ascore_job_posts(jobs: list[JobInfo], score_threshold: Optional[float] = None) -> list[JobInfo]:
+    """
+    Scores each job posting against the resume it was paired with, in the running event loop.
+
+    All postings are scored at once, so the total wait is roughly one LLM round-trip rather than
+    one per posting. With the real-time OpenAI backend, postings that share a resume are scored
+    several to a request so the resume is only sent once per group; otherwise each posting is
+    scored through score_resume_batch.
+
+    The same posting is often listed on several boards, so postings whose resume and description
+    only differ in whitespace are scored once and the result is copied to each of them.
+
+    When only the postings above a threshold matter (e.g. before identify_resume_gaps), pass it as
+    score_threshold: the real-time OpenAI backend then stops generating as soon as a posting's score
+    is known to be at or below it, and those postings come back without an explanation.
+
+    The backend's client is kept open for reuse within the running event loop; await close_client()
+    before that loop ends.
+
+    Args:
+        jobs (list[JobInfo]): Job postings with their description and resume filled in.
+        score_threshold (Optional[float]): Postings at or below this score don't get an explanation.
+                                           Defaults to None, which explains every posting.
+
+    Returns:
+        list[JobInfo]: The same jobs, in order, with score and explanation set. Postings that
+                       could not be scored get a score of -1.
+    """
+    unique: dict[bytes, JobInfo] = {}
+    fingerprints = []
+    for job in jobs:
+        fingerprint = _fingerprint(job)
+        unique.setdefault(fingerprint, job)
+        fingerprints.append(fingerprint)
+    if len(unique) < len(jobs):
+        logger.info("Scoring %d unique postings out of %d", len(unique), len(jobs))
+    unique_jobs = list(unique.values())
+
+    if AI_BACKEND == "openai" and score_threshold is not None:
+        models = get_backend(AI_BACKEND)
+        scores = await asyncio.gather(*(models.screen_resume(job.resume, job.description, score_threshold)
+                                        for job in unique_jobs))
+    elif AI_BACKEND == "openai":
+        scores = await _score_grouped_by_resume(unique_jobs)
+    else:
+        scores = await score_resume_batch([(job.resume, job.description) for job in unique_jobs])
+    score_by_fingerprint = dict(zip(unique, scores))
+    return [job.model_copy(update={"score": score_by_fingerprint[fingerprint].score,
+                                   "explanation": score_by_fingerprint[fingerprint].explanation})
+            for job, fingerprint in zip(jobs, fingerprints)]
+
+
+async def stream_score_job_posts(jobs: list[JobInfo]) -> AsyncIterator[JobInfo]:
+    """
+    Scores job postings concurrently and yields each one as soon as its score is in.
+
+    Lets a UI show results from the first completed posting instead of waiting for the slowest.
+    Duplicate postings are scored once, as in ascore_job_posts, and yielded together. If the caller
+    stops iterating early, the postings still being scored are cancelled.
+
+    The backend's client is kept open for reuse within the running event loop; await close_client()
+    before that loop ends.
+
+    Args:
+        jobs (list[JobInfo]): Job postings with their description and resume filled in.
+
+    Yields:
+        JobInfo: Copies of the jobs with score and explanation set, in completion order.
+    """
+    groups: dict[bytes, list[JobInfo]] = {}
+    for job in jobs:
+        groups.setdefault(_fingerprint(job), []).append(job)
+    models = get_backend(AI_BACKEND)
+    tasks = {asyncio.create_task(models.score_resume(group[0].resume, group[0].description)): group
+             for group in groups.values()}
+    try:
+        async for task in asyncio.as_completed(tasks):
+            score = await task
+            for job in tasks[task]:
+                yield job.model_copy(update={"score": score.score, "explanation": score.explanation})
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def identify_resume_gaps(jobs: Iterable[JobInfo], score_threshold: float = 0) -> str:
+    """
+    Summarizes the gaps called out across the explanations of the scored job postings.
+
+    Postings at or below the threshold are skipped, which also drops the -1 of a failed comparison.
+    The explanations are streamed into summarize_gaps with a generator, without building a list first.
+    If no posting clears the threshold, no request is made and an empty string is returned.
+
+    The backend's client is kept open for reuse within the running event loop; await close_client()
+    before that loop ends.
+
+    Args:
+        jobs (Iterable[JobInfo]): Scored job postings.
+        score_threshold (float, optional): Only postings scored above this are considered. Defaults to 0.
+
+    Returns:
+        str: A bullet-point list of missing skills or experiences, or "" if no posting cleared the threshold.
+    """
+    explanations = (job.explanation for job in jobs
+                    if job.score is not None and job.score > score_threshold)
+    first = next(explanations, None)
+    if first is None:
+        logger.info("No postings scored above %s, skipping gap summary", score_threshold)
+        return ""
+    return await get_backend(AI_BACKEND).summarize_gaps(chain((first,), explanations))
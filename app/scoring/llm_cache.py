@@ -0,0 +1,76 @@
+import atexit
+from collections import OrderedDict
+import hashlib
+import logging
+import os
+import shelve
+import time
+from typing import Optional
+
+from app.config import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_PATH = CACHE_DIR / "llm_cache.db"
+# Entries older than this many seconds are treated as misses, 0 keeps them forever
+LLM_CACHE_TTL_SEC = float(os.getenv("LLM_CACHE_TTL_SEC", "0"))
+# Recently used entries are also kept in memory so repeat lookups within a run skip the shelf
+LLM_CACHE_MEMORY_SIZE = 4096
+
+_store: Optional[shelve.Shelf] = None
+_memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+
+def _get_store() -> shelve.Shelf:
+    global _store
+    if _store is None:
+        _store = shelve.open(str(LLM_CACHE_PATH))
+        atexit.register(_store.close)
+    return _store
+
+
+def make_key(model: str, temperature: float, response_format: str, system_prompt: str, user_prompt: str,
+             examples: tuple[dict, ...] = ()) -> str:
+    """Hashes everything that determines an LLM response into a cache key."""
+    raw = f"{model}|{temperature}|{response_format}|{system_prompt}|{user_prompt}"
+    if examples:
+        raw += f"|{examples}"
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def get_cached(key: str) -> Optional[str]:
+    """
+    Looks up a previously stored LLM response.
+
+    Args:
+        key (str): A key built with make_key.
+
+    Returns:
+        Optional[str]: The stored response, or None on a miss or an expired entry.
+    """
+    entry = _memory.get(key)
+    if entry is None:
+        entry = _get_store().get(key)
+        if entry is None:
+            return None
+        _remember(key, entry)
+    else:
+        _memory.move_to_end(key)
+    stored_at, value = entry
+    if LLM_CACHE_TTL_SEC and time.time() - stored_at > LLM_CACHE_TTL_SEC:
+        return None
+    logger.info("LLM cache hit")
+    return value
+
+
+def _remember(key: str, entry: tuple[float, str]) -> None:
+    _memory[key] = entry
+    if len(_memory) > LLM_CACHE_MEMORY_SIZE:
+        _memory.popitem(last=False)
+
+
+def store(key: str, value: str) -> None:
+    """Saves an LLM response under the given key."""
+    entry = (time.time(), value)
+    _remember(key, entry)
+    _get_store()[key] = entry
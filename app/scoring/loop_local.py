@@ -0,0 +1,34 @@
+import asyncio
+from typing import Callable, Generic, Optional, TypeVar
+from weakref import WeakKeyDictionary
+
+T = TypeVar("T")
+
+
+class LoopLocal(Generic[T]):
+    """
+    Holds one value per running event loop, built by the factory the first time that loop asks for it.
+
+    Pooled HTTP clients and asyncio primitives are bound to the loop they were first used on, so a
+    module-level instance breaks on the second asyncio.run in a process. Values are keyed weakly by
+    their loop and dropped once the loop is garbage collected.
+
+    Args:
+        factory (Callable[[], T]): Builds the value for a loop; called from inside that loop.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._values: WeakKeyDictionary[asyncio.AbstractEventLoop, T] = WeakKeyDictionary()
+
+    def get(self) -> T:
+        """Returns the value of the running loop, building it on first use."""
+        loop = asyncio.get_running_loop()
+        value = self._values.get(loop)
+        if value is None:
+            value = self._values[loop] = self._factory()
+        return value
+
+    def pop(self) -> Optional[T]:
+        """Removes and returns the value of the running loop, or None if it was never built."""
+        return self._values.pop(asyncio.get_running_loop(), None)
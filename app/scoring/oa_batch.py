@@ -0,0 +1,163 @@
+import asyncio
+import logging
+from typing import Optional
+
+import orjson
+
+from app.datamodels.models import JDScore
+from app.scoring.oa_client import get_client
+from app.scoring.oa_models import json_schema_format, model_for, score_resume_prompts
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchProcessor:
+    """
+    Runs chat completion requests through the OpenAI Batch API.
+
+    Batched requests are billed at half the real-time price and don't count against
+    the synchronous rate limits, at the cost of completing anywhere within the 24h window.
+    Suited to offline runs where many (resume, job description) pairs are scored at once.
+
+    Args:
+        poll_interval (float, optional): Seconds to wait before the first status check. Defaults to 30.
+        max_poll_interval (float, optional): Upper bound for the wait between status checks, which
+                                             doubles after each check. Defaults to 600.
+    """
+
+    def __init__(self, poll_interval: float = 30.0, max_poll_interval: float = 600.0):
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.batch_id: Optional[str] = None
+
+    def build_jsonl(self, requests: dict[str, dict]) -> bytes:
+        """
+        Serializes requests into the JSONL format expected by the Batch API.
+
+        Args:
+            requests (dict[str, dict]): Chat completion request bodies keyed by custom_id.
+
+        Returns:
+            bytes: One request per line.
+        """
+        return b"".join(
+            orjson.dumps({"custom_id": custom_id, "method": "POST",
+                          "url": BATCH_ENDPOINT, "body": body}, option=orjson.OPT_APPEND_NEWLINE)
+            for custom_id, body in requests.items()
+        )
+
+    async def submit(self, requests: dict[str, dict]) -> str:
+        """Uploads the requests as a batch input file and starts the batch job."""
+        batch_file = await get_client().files.create(
+            file=("batch_input.jsonl", self.build_jsonl(requests)), purpose="batch")
+        batch = await get_client().batches.create(
+            input_file_id=batch_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+        )
+        self.batch_id = batch.id
+        logger.info(
+            "Submitted batch %s with %d requests", batch.id, len(requests))
+        return batch.id
+
+    async def poll(self):
+        """
+        Waits for the submitted batch to reach a terminal status and returns it.
+
+        The wait between checks doubles each time, up to max_poll_interval, since batches
+        that aren't done in the first few minutes usually take hours.
+        """
+        delay = self.poll_interval
+        while True:
+            batch = await get_client().batches.retrieve(self.batch_id)
+            if batch.status in TERMINAL_STATUSES:
+                break
+            logger.info(
+                "Batch %s is %s, checking again in %ss", batch.id, batch.status, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_poll_interval)
+        if batch.status != "completed":
+            raise RuntimeError(
+                f"Batch {batch.id} finished with status {batch.status}")
+        return batch
+
+    async def fetch(self, batch) -> dict[str, dict]:
+        """
+        Downloads the batch output and demultiplexes it by custom_id.
+
+        Returns:
+            dict[str, dict]: Chat completion response bodies keyed by custom_id. Requests that
+                             errored are left out.
+        """
+        results = {}
+        if not batch.output_file_id:
+            return results
+        content = await get_client().files.content(batch.output_file_id)
+        for line in content.content.splitlines():
+            if not line:
+                continue
+            record = orjson.loads(line)
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                logger.error(
+                    "Batch request %s failed: %s", record["custom_id"], record.get("error") or response.get("status_code"))
+                continue
+            results[record["custom_id"]] = response["body"]
+        return results
+
+    async def run(self, requests: dict[str, dict]) -> dict[str, dict]:
+        """Submits the requests, waits for the batch to finish and returns the responses."""
+        await self.submit(requests)
+        batch = await self.poll()
+        return await self.fetch(batch)
+
+
+def build_score_request(resume_text: str, job_description: str) -> dict:
+    """Builds the chat completion body for scoring one resume against one job description."""
+    system_prompt, user_prompt = score_resume_prompts(
+        resume_text, job_description)
+    return {
+        "model": model_for("score_resume"),
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        "response_format": json_schema_format(JDScore),
+        "temperature": 0.0,
+    }
+
+
+async def score_resume_batch(pairs: list[tuple[str, str]], poll_interval: float = 30.0) -> list[JDScore]:
+    """
+    Scores many (resume, job description) pairs through the Batch API.
+
+    Args:
+        pairs (list[tuple[str, str]]): (resume_text, job_description) pairs to score.
+        poll_interval (float, optional): Seconds to wait between status checks. Defaults to 30.
+
+    Returns:
+        list[JDScore]: One score per pair, in input order. Pairs that could not be scored
+                       get a score of -1.
+    """
+    requests = {
+        str(i): build_score_request(resume_text, job_description)
+        for i, (resume_text, job_description) in enumerate(pairs)
+    }
+    responses = await BatchProcessor(poll_interval=poll_interval).run(requests)
+
+    scores = []
+    for custom_id in requests:
+        if custom_id not in responses:
+            scores.append(JDScore(score=-1, explanation="Comparison failed"))
+            continue
+        try:
+            content = responses[custom_id]["choices"][0]["message"]["content"]
+            scores.append(JDScore.model_validate_json(content))
+        except Exception as e:
+            logger.error("Failed to score resume for request %s: %s", custom_id, e)
+            scores.append(JDScore(score=-1, explanation="Comparison failed"))
+    logger.info("Batch resume scoring complete!")
+    return scores
@@ -0,0 +1,36 @@
+from app.config import OPENAI_API_KEY
+from app.scoring.loop_local import LoopLocal
+
+
+def _build_client():
+    """
+    Builds the OpenAI client for the running event loop.
+
+    All requests go through one pooled HTTP/2 connection so concurrent calls are multiplexed
+    instead of each paying for its own TLS handshake.
+    """
+    import httpx
+    from openai import AsyncOpenAI
+    http_client = httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(60.0, connect=5.0),
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+    )
+    # Retries are handled by the tenacity policy in oa_models, so the SDK's own retry loop is turned off
+    return AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=http_client, max_retries=0)
+
+
+# The pooled connections belong to the loop that opened them, so each event loop gets its own client
+_clients = LoopLocal(_build_client)
+
+
+def get_client():
+    """Returns the OpenAI client of the running event loop, building it on first use so importing stays cheap."""
+    return _clients.get()
+
+
+async def close_client() -> None:
+    """Closes the running loop's pooled connections, if its client was ever built. Call before the loop ends."""
+    client = _clients.pop()
+    if client is not None:
+        await client.close()
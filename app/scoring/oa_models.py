@@ -1,99 +1,327 @@
+import asyncio
+from functools import lru_cache
 import logging
-from typing import Optional
-import yaml
+import os
+import re
+from types import MappingProxyType
+from typing import AsyncIterator, Iterable, Optional
+
+from app.scoring import llm_cache
+from app.scoring.loop_local import LoopLocal
+from app.scoring.oa_client import close_client, get_client
+from app.scoring.retry import retry_transient
+from app.scoring.semantic_cache import SEMANTIC_CACHE_ENABLED, SemanticCache
+from app.datamodels.models import (
+    RESPONSE_SCHEMAS, ComparisonExtract, WorkflowReqs, GateAndReqs, JDScore, JDScoreList, ResumeSuggestions, FullAnalysis)
+
+__all__ = [
+    "DEFAULT_MODEL", "CLASSIFIER_MODEL", "MAX_CONCURRENCY", "model_for", "get_prompt", "get_examples",
+    "json_schema_format", "formatted_chat_completion", "basic_chat_completion", "stream_chat_completion",
+    "embed_text", "semantic_lookup", "check_request", "extract_reqs", "check_and_extract_reqs", "extract_tailoring",
+    "score_resume_prompts", "score_resume", "screen_resume", "score_resume_multi", "summarize_gaps",
+    "summarize_gaps_stream", "suggest_edits", "analyze_resume", "close_client",
+]
 
-from openai import OpenAI
-
-from app.config import OPENAI_API_KEY
-from app.datamodels.models import ComparisonExtract, WorkflowReqs, JDScore, ResumeSuggestions
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
 logger = logging.getLogger(__name__)
 
-# $0.10 per mil Smallest, cheapest for prototyping
-model = "gpt-4.1-nano-2025-04-14"
-# model = "gpt-4.1-mini-2025-04-14" #$0.40 per mil
+# $0.40 per mil, used where reasoning quality matters (gaps, edits)
+DEFAULT_MODEL = "gpt-4.1-mini-2025-04-14"
+# $0.10 per mil Smallest, cheapest; enough for classification and the scoring rubric
+CLASSIFIER_MODEL = "gpt-4.1-nano-2025-04-14"
 # model = "gpt-4.1-2025-04-14" #$2.00 per million
+embedding_model = "text-embedding-3-small"
+
+# Model used by each task, overridable per task with OA_MODEL_<TASK> (e.g. OA_MODEL_SCORE_RESUME)
+# so nano and mini can be compared on your own data before changing a default
+_TASK_MODELS = MappingProxyType({
+    task: os.getenv(f"OA_MODEL_{task.upper()}", default)
+    for task, default in {
+        "check_request": CLASSIFIER_MODEL,
+        "extract_reqs": CLASSIFIER_MODEL,
+        "check_and_extract_reqs": CLASSIFIER_MODEL,
+        "extract_tailoring": CLASSIFIER_MODEL,
+        "score_resume": CLASSIFIER_MODEL,
+        "summarize_gaps": DEFAULT_MODEL,
+        "suggest_edits": DEFAULT_MODEL,
+        "analyze_resume": DEFAULT_MODEL,
+    }.items()
+})
+
+
+def model_for(task: str) -> str:
+    """The model a task runs on."""
+    return _TASK_MODELS[task]
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """Whether an OpenAI error is worth retrying: rate limits, timeouts, dropped connections and 5xx."""
+    import openai
+    return isinstance(exc, (openai.RateLimitError, openai.APITimeoutError,
+                            openai.APIConnectionError, openai.InternalServerError))
+
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+_retry_transient = retry_transient(_is_transient, logger)
 
-# Load prompts from the YAML file
-with open("app/scoring/oa_prompts.yaml", "r") as f:
-    prompts = yaml.safe_load(f)
+# Caps in-flight requests so concurrent workflow steps and large job lists stay under rate limits.
+# A semaphore is bound to the loop it first waits on, so each event loop gets its own.
+MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+_request_slots = LoopLocal(lambda: asyncio.Semaphore(MAX_CONCURRENCY))
+
+# Near-duplicate prompts reuse these results when SEMANTIC_CACHE=1
+_score_cache = SemanticCache(f"score_resume_{model_for('score_resume')}")
+_gaps_cache = SemanticCache(f"summarize_gaps_{model_for('summarize_gaps')}")
+
+
+@lru_cache(maxsize=1)
+def _load_prompts() -> MappingProxyType:
+    """
+    Loads the prompts from the YAML file once, flattened to (prompt_name, message_type) keys.
+
+    CSafeLoader is the libyaml-backed parser; fall back to the pure Python one if it isn't built.
+    """
+    import yaml
+    with open("app/scoring/oa_prompts.yaml", "r") as f:
+        raw_prompts = yaml.load(f, Loader=getattr(
+            yaml, "CSafeLoader", yaml.SafeLoader))
+    return MappingProxyType({
+        (prompt_name, message_type): message
+        for prompt_name, messages in raw_prompts["prompts"].items()
+        for message_type, message in messages.items()
+    })
 
 
 def get_prompt(prompt_name: str, message_type: str) -> str:
     """A helper function to get a specific prompt message."""
-    return prompts['prompts'][prompt_name][message_type]
-
-
-def formatted_chat_completion(system_prompt: str, user_prompt: str, response_format, temperature=1.0):
-    completion = client.beta.chat.completions.parse(
-        model=model,
-        messages=[
-            {
-                "role": "system",
-                "content": system_prompt
-            },
-            {"role": "user", "content": user_prompt}
-        ],
-        response_format=response_format,
-        temperature=temperature
-    )
-    result = completion.choices[0].message.parsed
+    return _load_prompts()[(prompt_name, message_type)]
+
+
+def get_examples(prompt_name: str) -> tuple[dict, ...]:
+    """The few-shot user/assistant messages for a prompt, empty if it has none."""
+    return tuple(_load_prompts().get((prompt_name, "examples"), ()))
+
+
+def _log_usage(completion) -> None:
+    """Logs how many prompt tokens OpenAI served from its prefix cache, to check the shared prefix is working."""
+    usage = completion.usage
+    if usage is None:
+        return
+    details = usage.prompt_tokens_details
+    logger.debug("Prompt tokens: %d, served from prompt cache: %d",
+                 usage.prompt_tokens, (details.cached_tokens if details else None) or 0)
+
+
+@lru_cache(maxsize=None)
+def json_schema_format(response_format) -> dict:
+    """
+    The structured-output response_format for a pydantic model, built from its precomputed schema.
+
+    Models without a precomputed strict schema (e.g. ones with optional fields or defaults) fall back
+    to their plain JSON schema in non-strict mode; the reply is still validated by the model itself.
+    """
+    schema = RESPONSE_SCHEMAS.get(response_format)
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": response_format.__name__,
+            "schema": schema if schema is not None else response_format.model_json_schema(),
+            "strict": schema is not None,
+        },
+    }
+
+
+@_retry_transient
+async def formatted_chat_completion(system_prompt: str, user_prompt: str, response_format, temperature=1.0,
+                                    model: Optional[str] = None, examples: tuple[dict, ...] = ()):
+    model = model or DEFAULT_MODEL
+    cache_key = llm_cache.make_key(model, temperature, response_format.__name__,
+                                   system_prompt, user_prompt, examples)
+    cached = llm_cache.get_cached(cache_key)
+    if cached is not None:
+        return response_format.model_validate_json(cached)
+
+    async with _request_slots.get():
+        completion = await get_client().chat.completions.create(
+            model=model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": system_prompt
+                },
+                *examples,
+                {"role": "user", "content": user_prompt}
+            ],
+            response_format=json_schema_format(response_format),
+            temperature=temperature
+        )
+    _log_usage(completion)
+    content = completion.choices[0].message.content
+    if content is None:
+        return None
+    result = response_format.model_validate_json(content)
+    llm_cache.store(cache_key, content)
     return result
 
 
-def basic_chat_completion(system_prompt: str, user_prompt: str, temperature=1.0) -> str:
-    completion = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ],
-        temperature=temperature
-    )
+@_retry_transient
+async def basic_chat_completion(system_prompt: str, user_prompt: str, temperature=1.0,
+                                model: Optional[str] = None, examples: tuple[dict, ...] = ()) -> str:
+    model = model or DEFAULT_MODEL
+    cache_key = llm_cache.make_key(model, temperature, "text",
+                                   system_prompt, user_prompt, examples)
+    cached = llm_cache.get_cached(cache_key)
+    if cached is not None:
+        return cached
+
+    async with _request_slots.get():
+        completion = await get_client().chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                *examples,
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=temperature
+        )
+    _log_usage(completion)
     result = completion.choices[0].message.content
+    if result is not None:
+        llm_cache.store(cache_key, result)
     return result
 
 
-def check_request(prompt: str) -> ComparisonExtract:
+async def stream_chat_completion(system_prompt: str, user_prompt: str, temperature=1.0,
+                                 model: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Streams a plain text completion, yielding content deltas as they arrive.
+
+    A cached response is yielded as a single chunk. The full text is cached once the stream ends.
+    """
+    model = model or DEFAULT_MODEL
+    cache_key = llm_cache.make_key(model, temperature, "text",
+                                   system_prompt, user_prompt)
+    cached = llm_cache.get_cached(cache_key)
+    if cached is not None:
+        yield cached
+        return
+
+    chunks = []
+    async with _request_slots.get():
+        async with get_client().chat.completions.stream(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=temperature
+        ) as stream:
+            async for event in stream:
+                if event.type == "content.delta":
+                    chunks.append(event.delta)
+                    yield event.delta
+    llm_cache.store(cache_key, "".join(chunks))
+
+
+def _resume_block(resume_text: str) -> str:
+    """The resume block that every resume task's user message starts with."""
+    return f"Resume:\n---\n{resume_text}\n---\n\n"
+
+
+def _ctx(resume_text: str, job_description: str) -> str:
+    """The resume/JD block that single-JD resume tasks start their user message with."""
+    return _resume_block(resume_text) + f"Job Description:\n---\n{job_description}\n---\n\n"
+
+
+@_retry_transient
+async def embed_text(text: str) -> list[float]:
+    async with _request_slots.get():
+        response = await get_client().embeddings.create(model=embedding_model, input=text)
+    return response.data[0].embedding
+
+
+async def semantic_lookup(cache: SemanticCache, text: str,
+                          cache_key: str) -> tuple[Optional[list[float]], Optional[str]]:
+    """
+    Checks the exact-match cache, then embeds the text and checks the semantic cache for a response
+    to a near-identical prompt.
+
+    The exact-match cache is checked first so an identical re-run doesn't pay for an embedding request.
+
+    Args:
+        cache (SemanticCache): The semantic cache of the task.
+        text (str): The text to embed.
+        cache_key (str): The exact-match llm_cache key of the request the task would make.
+
+    Returns:
+        tuple: The embedding (to store the fresh result under on a miss) and the cached response.
+               The embedding is None on an exact hit, when the semantic cache is disabled or when
+               the embedding call fails.
+    """
+    cached = llm_cache.get_cached(cache_key)
+    if cached is not None or not SEMANTIC_CACHE_ENABLED:
+        return None, cached
+    try:
+        vector = await embed_text(text)
+    except Exception as e:
+        logger.warning("Skipping semantic cache, embedding failed: %s", e)
+        return None, None
+    return vector, cache.lookup(vector)
+
+
+async def check_request(prompt: str) -> ComparisonExtract:
     logger.info("Checking prompt validity")
     system_prompt = get_prompt("check_request", "system_message")
-    result = formatted_chat_completion(system_prompt=system_prompt, user_prompt=prompt,
-                                       response_format=ComparisonExtract)
+    result = await formatted_chat_completion(system_prompt=system_prompt, user_prompt=prompt,
+                                             response_format=ComparisonExtract, model=model_for("check_request"),
+                                             examples=get_examples("check_request"))
     logger.info("Check complete!")
     return result
 
 
-def extract_reqs(prompt: str) -> WorkflowReqs:
+async def extract_reqs(prompt: str) -> WorkflowReqs:
     logger.info("Starting prompt extraction")
     system_prompt = get_prompt("extract_reqs", "system_message")
-    result = formatted_chat_completion(system_prompt=system_prompt, user_prompt=prompt,
-                                       response_format=WorkflowReqs, temperature=0.0)
+    result = await formatted_chat_completion(system_prompt=system_prompt, user_prompt=prompt,
+                                             response_format=WorkflowReqs, temperature=0.0,
+                                             model=model_for("extract_reqs"), examples=get_examples("extract_reqs"))
     logger.info("Extraction complete!")
     return result
 
 
-def extract_tailoring(resume_text: str, job_description: str) -> str:
+async def check_and_extract_reqs(prompt: str) -> GateAndReqs:
+    """Runs check_request and extract_reqs as one request, so the prompt is only sent once."""
+    logger.info("Checking prompt and extracting requests")
+    system_prompt = get_prompt("check_and_extract_reqs", "system_message")
+    result = await formatted_chat_completion(system_prompt=system_prompt, user_prompt=prompt,
+                                             response_format=GateAndReqs, temperature=0.0,
+                                             model=model_for("check_and_extract_reqs"),
+                                             examples=get_examples("check_and_extract_reqs"))
+    logger.info("Check and extraction complete!")
+    return result
+
+
+async def extract_tailoring(resume_text: str, job_description: str) -> str:
     logger.info("Starting tailoring extraction")
-    system_prompt = get_prompt("extract_tailoring", "system_message")
-    user_prompt = (
-        f"Resume:\n---\n{resume_text}\n---\n\n"
-        f"Job Description:\n---\n{job_description}\n---\n\n"
-        "Score this resume against the job description (0-10):"
-    )
-    result = basic_chat_completion(system_prompt=system_prompt, user_prompt=user_prompt,
-                                   temperature=0.0)
+    system_prompt = get_prompt("resume_context", "system_message")
+    user_prompt = _ctx(resume_text, job_description) + get_prompt("extract_tailoring", "task_message")
+    result = await basic_chat_completion(system_prompt=system_prompt, user_prompt=user_prompt,
+                                         temperature=0.0, model=model_for("extract_tailoring"))
     logger.info("Extraction complete!")
     return result
 
 
-def score_resume(resume_text: str, job_description: str) -> JDScore:
+def score_resume_prompts(resume_text: str, job_description: str) -> tuple[str, str]:
+    """Builds the (system, user) prompt pair used to score a resume against a job description."""
+    system_prompt = get_prompt("resume_context", "system_message")
+    user_prompt = _ctx(resume_text, job_description) + get_prompt("score_resume", "task_message")
+    return system_prompt, user_prompt
+
+
+def _score_key(system_prompt: str, user_prompt: str) -> str:
+    """The exact-match cache key score_resume's request is stored under, shared by screen_resume and score_resume_multi."""
+    return llm_cache.make_key(model_for("score_resume"), 0.0, JDScore.__name__, system_prompt, user_prompt)
+
+
+async def score_resume(resume_text: str, job_description: str) -> JDScore:
     """
     Evaluates the suitability of a resume for a specific job description.
 
@@ -109,24 +337,176 @@ def score_resume(resume_text: str, job_description: str) -> JDScore:
     Returns:
         JDScore: An object containing the suitability score and an explanation.
     """
-    system_prompt = get_prompt("score_resume", "system_message")
-    user_prompt = (
-        f"Resume:\n---\n{resume_text}\n---\n\n"
-        f"Job Description:\n---\n{job_description}\n---\n\n"
-        "Score this resume against the job description (0-10):"
-    )
+    system_prompt, user_prompt = score_resume_prompts(
+        resume_text, job_description)
+    vector, cached = await semantic_lookup(_score_cache, f"{resume_text}\n---\n{job_description}",
+                                           _score_key(system_prompt, user_prompt))
+    if cached is not None:
+        return JDScore.model_validate_json(cached)
 
     try:
-        result = formatted_chat_completion(system_prompt=system_prompt, user_prompt=user_prompt,
-                                           response_format=JDScore, temperature=0.0)
+        result = await formatted_chat_completion(system_prompt=system_prompt, user_prompt=user_prompt,
+                                                 response_format=JDScore, temperature=0.0,
+                                                 model=model_for("score_resume"))
         logger.info("Resume scoring successful!")
+        if vector is not None:
+            _score_cache.add(vector, result.model_dump_json())
     except Exception as e:
-        logger.error(f"Failed to score resume: {e}")
+        logger.error("Failed to score resume: %s", e)
         result = JDScore(score=-1, explanation="Comparison failed")
     return result
 
 
-def summarize_gaps(explanation: str) -> str:
+# Matches the score once its value is complete, i.e. followed by the next field or the closing brace
+_SCORE_FIELD = re.compile(r'"score"\s*:\s*(-?\d+(?:\.\d+)?)\s*[,}]')
+
+
+@_retry_transient
+async def _stream_score(system_prompt: str, user_prompt: str, score_threshold: float) -> JDScore:
+    """Streams a JDScore and hangs up as soon as the score is known to be at or below the threshold."""
+    model = model_for("score_resume")
+    cache_key = _score_key(system_prompt, user_prompt)
+    cached = llm_cache.get_cached(cache_key)
+    if cached is not None:
+        return JDScore.model_validate_json(cached)
+
+    content = ""
+    score_seen = False
+    async with _request_slots.get():
+        stream = await get_client().chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            response_format=json_schema_format(JDScore),
+            temperature=0.0,
+            stream=True
+        )
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                content += chunk.choices[0].delta.content or ""
+                if score_seen:
+                    continue
+                match = _SCORE_FIELD.search(content)
+                if match is None:
+                    continue
+                score_seen = True
+                score = float(match.group(1))
+                if score <= score_threshold:
+                    return JDScore(score=score, explanation="")
+        finally:
+            await stream.close()
+    llm_cache.store(cache_key, content)
+    return JDScore.model_validate_json(content)
+
+
+async def screen_resume(resume_text: str, job_description: str, score_threshold: float) -> JDScore:
+    """
+    Scores a resume like score_resume, but skips the explanation for jobs that don't clear the threshold.
+
+    JDScore's schema puts the score before the explanation, so the response is streamed and closed as
+    soon as the score arrives if it's at or below the threshold. Those jobs cost only a handful of
+    output tokens; jobs above the threshold get the full explanation.
+
+    Args:
+        resume_text (str): The plain text content of the candidate's resume.
+        job_description (str): The plain text content of the job description.
+        score_threshold (float): Jobs scored at or below this come back with an empty explanation.
+
+    Returns:
+        JDScore: An object containing the suitability score and, above the threshold, an explanation.
+    """
+    system_prompt, user_prompt = score_resume_prompts(
+        resume_text, job_description)
+    try:
+        result = await _stream_score(system_prompt, user_prompt, score_threshold)
+        logger.info("Resume screening successful!")
+    except Exception as e:
+        logger.error("Failed to score resume: %s", e)
+        result = JDScore(score=-1, explanation="Comparison failed")
+    return result
+
+
+async def score_resume_multi(resume_text: str, job_descriptions: list[str]) -> list[JDScore]:
+    """
+    Scores one resume against several job descriptions in a single LLM request.
+
+    The resume is sent once rather than once per job description, and its block is the same
+    prefix the single-JD tasks use, so it stays eligible for prompt caching. If the reply can't
+    be used (request failed, or the number of scores doesn't match), each job description is
+    scored on its own with score_resume instead.
+
+    Each score is cached under the same key as score_resume's, so only the job descriptions that
+    have never been scored go into the request; adding one posting doesn't re-score the others.
+
+    Args:
+        resume_text (str): The plain text content of the candidate's resume.
+        job_descriptions (list[str]): The plain text of each job description.
+
+    Returns:
+        list[JDScore]: One score per job description, in input order.
+    """
+    keys = [_score_key(*score_resume_prompts(resume_text, job_description)) for job_description in job_descriptions]
+    scores: list[Optional[JDScore]] = []
+    for key in keys:
+        cached = llm_cache.get_cached(key)
+        scores.append(None if cached is None else JDScore.model_validate_json(cached))
+    misses = [i for i, score in enumerate(scores) if score is None]
+    if not misses:
+        return scores
+
+    system_prompt = get_prompt("resume_context", "system_message")
+    user_prompt = _resume_block(resume_text) + "".join(
+        f"Job Description [{n}]:\n---\n{job_descriptions[i]}\n---\n\n"
+        for n, i in enumerate(misses)
+    ) + get_prompt("score_resume_multi", "task_message")
+
+    try:
+        result = await formatted_chat_completion(system_prompt=system_prompt, user_prompt=user_prompt,
+                                                 response_format=JDScoreList, temperature=0.0,
+                                                 model=model_for("score_resume"))
+        if result is not None and len(result.scores) == len(misses):
+            logger.info("Scored %d job descriptions in one request", len(misses))
+            for i, score in zip(misses, result.scores):
+                llm_cache.store(keys[i], score.model_dump_json())
+                scores[i] = score
+            return scores
+        logger.warning("Multi-JD scoring returned the wrong number of scores, scoring one at a time")
+    except Exception as e:
+        logger.warning("Multi-JD scoring failed, scoring one at a time: %s", e)
+    fallback = await asyncio.gather(*(score_resume(resume_text, job_descriptions[i]) for i in misses))
+    for i, score in zip(misses, fallback):
+        scores[i] = score
+    return scores
+
+
+def _gaps_key(system_prompt: str, user_prompt: str) -> str:
+    """The exact-match cache key of the gaps request, the same for summarize_gaps and summarize_gaps_stream."""
+    return llm_cache.make_key(model_for("summarize_gaps"), 0.0, "text", system_prompt, user_prompt)
+
+
+def _gaps_prompts(explanations: Iterable[str]) -> tuple[str, str]:
+    """
+    Builds the (system, user) prompt pair used to summarize the gaps in one or more scoring rationales.
+
+    The explanations are consumed once while joining, so a generator can be passed straight through.
+    """
+    if isinstance(explanations, str):
+        # Kept for callers still passing a single rationale; a bare str would be joined per character
+        explanations = (explanations,)
+    rationales = "\n--\n".join(f"Rationale: {explanation}" for explanation in explanations)
+    user_prompt = (
+        f"{rationales}\n--\n\n"
+        "Analyze the rationale above to identify missing skills or experiences.\n"
+        "List the identified gaps:"
+    )
+    return get_prompt("summarize_gaps", "system_message"), user_prompt
+
+
+async def summarize_gaps(explanations: Iterable[str]) -> str:
     """
     Analyzes an explanation to extract missing skills or experiences.
 
@@ -136,47 +516,110 @@ def summarize_gaps(explanation: str) -> str:
     candidates understand what areas of their resume could be strengthened to better match job requirements.
 
     Args:
-        explanations (List[str]): List of rationale strings, each describing aspects of a candidate's profile
-                                  in relation to a job description.
+        explanations (Iterable[str]): Rationale strings, each describing aspects of a candidate's profile
+                                      in relation to a job description.
 
     Returns:
         str: A bullet-point list of missing skills or experiences, as identified by the LLM.
     """
     logger.info("Starting gap summarizer")
+    system_prompt, user_prompt = _gaps_prompts(explanations)
 
-    explanation = f"Rationale: {explanation}"
-    system_prompt = get_prompt("summarize_gaps", "system_message")
-    user_prompt = (
-        f"Analyze the following rationale to identify missing skills or experiences:\n"
-        f"{'\n--\n'.join(explanation)}\n--\n\n"
-        "List the identified gaps:"
-    )
+    vector, cached = await semantic_lookup(_gaps_cache, user_prompt, _gaps_key(system_prompt, user_prompt))
+    if cached is not None:
+        return cached
 
     try:
-        result = basic_chat_completion(system_prompt=system_prompt, user_prompt=user_prompt,
-                                       temperature=0.0)
+        result = await basic_chat_completion(system_prompt=system_prompt, user_prompt=user_prompt,
+                                             temperature=0.0, model=model_for("summarize_gaps"))
         logger.info("Gap summarizaton complete")
+        if vector is not None:
+            _gaps_cache.add(vector, result)
     except Exception as e:
-        logger.error(f"Failed to identify gaps resume: {e}")
+        logger.error("Failed to identify gaps resume: %s", e)
         result = f"Unable to analyze gaps: {e}"
     return result
 
 
-def suggest_edits(resume_text: str, job_description: str, gaps: Optional[str]) -> ResumeSuggestions:
-    system_prompt = get_prompt("suggest_edits", "system_message")
-    user_prompt = (
-        "Provide edit suggestions for my resume:"
-        f"Resume:\n---\n{resume_text}\n---\n\n"
-        f"Job Description:\n---\n{job_description}\n---\n\n"
-    )
+async def summarize_gaps_stream(explanations: Iterable[str]) -> AsyncIterator[str]:
+    """
+    Streaming variant of summarize_gaps, yielding the bullet-point list as it is generated.
+
+    Lets the CLI print the gaps from the first token instead of waiting for the whole list.
+
+    Args:
+        explanations (Iterable[str]): Rationale strings, each describing aspects of a candidate's profile
+                                      in relation to a job description.
+
+    Yields:
+        str: Successive chunks of the bullet-point list.
+    """
+    logger.info("Starting gap summarizer")
+    system_prompt, user_prompt = _gaps_prompts(explanations)
+
+    vector, cached = await semantic_lookup(_gaps_cache, user_prompt, _gaps_key(system_prompt, user_prompt))
+    if cached is not None:
+        yield cached
+        return
+
+    chunks = []
+    try:
+        async for delta in stream_chat_completion(system_prompt=system_prompt, user_prompt=user_prompt,
+                                                  temperature=0.0, model=model_for("summarize_gaps")):
+            chunks.append(delta)
+            yield delta
+        logger.info("Gap summarizaton complete")
+        if vector is not None:
+            _gaps_cache.add(vector, "".join(chunks))
+    except Exception as e:
+        logger.error("Failed to identify gaps resume: %s", e)
+        yield f"Unable to analyze gaps: {e}"
+
+
+async def suggest_edits(resume_text: str, job_description: str, gaps: Optional[str]) -> ResumeSuggestions:
+    system_prompt = get_prompt("resume_context", "system_message")
+    user_prompt = _ctx(resume_text, job_description)
     if gaps:
         user_prompt += f"A separate analysis indicated these gaps: \n---\n{gaps}\n---\n\n"
+    user_prompt += get_prompt("suggest_edits", "task_message")
 
     try:
-        result = formatted_chat_completion(system_prompt=system_prompt, user_prompt=user_prompt,
-                                           response_format=ResumeSuggestions, temperature=0.0)
+        result = await formatted_chat_completion(system_prompt=system_prompt, user_prompt=user_prompt,
+                                                 response_format=ResumeSuggestions, temperature=0.0,
+                                                 model=model_for("suggest_edits"))
         logger.info("Resume edit suggestions request successful!")
     except Exception as e:
-        logger.error(f"Failed to score resume: {e}")
+        logger.error("Failed to suggest resume edits: %s", e)
         result = ResumeSuggestions(suggestions="Comparison failed")
     return result
+
+
+async def analyze_resume(resume_text: str, job_description: str) -> FullAnalysis:
+    """
+    Scores a resume, summarizes its gaps and suggests edits in a single LLM request.
+
+    Equivalent to calling score_resume, summarize_gaps and suggest_edits in turn, but the
+    resume and job description are only sent once and there is one round-trip instead of three.
+
+    Args:
+        resume_text (str): The plain text content of the candidate's resume.
+        job_description (str): The plain text content of the job description.
+
+    Returns:
+        FullAnalysis: The suitability score, the identified gaps and the edit suggestions.
+    """
+    system_prompt = get_prompt("resume_context", "system_message")
+    user_prompt = _ctx(resume_text, job_description) + get_prompt("analyze_resume", "task_message")
+
+    try:
+        result = await formatted_chat_completion(system_prompt=system_prompt, user_prompt=user_prompt,
+                                                 response_format=FullAnalysis, temperature=0.0,
+                                                 model=model_for("analyze_resume"))
+        logger.info("Resume analysis successful!")
+    except Exception as e:
+        logger.error("Failed to analyze resume: %s", e)
+        result = FullAnalysis(
+            score=JDScore(score=-1, explanation="Comparison failed"),
+            gaps=f"Unable to analyze gaps: {e}",
+            suggestions=ResumeSuggestions(suggestions="Comparison failed"))
+    return result
@@ -1,23 +1,242 @@
+import asyncio
+from functools import lru_cache
 import logging
+import os
+import re
+from typing import AsyncIterator, Iterable, Optional, TypeVar
 
-from ollama import chat
+import httpx
+from ollama import AsyncClient, ResponseError
+from pydantic import BaseModel, ValidationError
 
-from datamodels.models import ComparisonExtract, WorkflowReqs, JDScore, ResumeDigest
+from app.datamodels.models import (
+    ComparisonExtract, FullAnalysis, GateAndReqs, JDScore, ResumeDigest, ResumeSuggestions, WorkflowReqs)
+from app.scoring import llm_cache
+from app.scoring.loop_local import LoopLocal
+from app.scoring.retry import retry_transient
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T", bound=BaseModel)
+
 model = "gemma3:1b"
 
-def check_request(prompt: str) -> ComparisonExtract:
+# Requests the Ollama server works on at once. Keep in line with the server's OLLAMA_NUM_PARALLEL
+# (and OLLAMA_MAX_LOADED_MODELS if several models are served), otherwise extra requests just queue there.
+OLLAMA_NUM_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+
+# A semaphore is bound to the loop it first waits on, so each event loop gets its own
+_request_slots = LoopLocal(lambda: asyncio.Semaphore(OLLAMA_NUM_PARALLEL))
+# Optional cap on requests started per minute, for a shared server; 0 leaves only the in-flight cap
+OLLAMA_RATE_LIMIT_PER_MINUTE = float(os.getenv("OLLAMA_RATE_LIMIT_PER_MINUTE", "0"))
+_next_request_at = 0.0
+
+# Rough cap on the tokens of each resume or job description sent for scoring. Both have to fit the model's
+# context next to the instructions, and each slot only gets 1/OLLAMA_NUM_PARALLEL of the server's context.
+# Tokens are estimated from characters, which is close enough for English text and needs no tokenizer call.
+MAX_INPUT_TOKENS = int(os.getenv("OLLAMA_MAX_INPUT_TOKENS", "1500"))
+_CHARS_PER_TOKEN = 4
+
+# Every call asks for the same context size and keeps the model loaded between runs. A different
+# num_ctx makes the server reload the model, and an unloaded model loses its cached prompt prefixes.
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "4096"))
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+_SCORE_SYS = (
+    "You are an expert resume evaluator. Score how well the resume below fits the job description "
+    "from 0 (no fit) to 10 (perfect fit). Be harsh but fair, weighing skills, experience, qualifications "
+    "and alignment with the role's responsibilities. Give the score as a float and a short explanation "
+    "(<100 words)."
+)
+# A score plus an explanation of <100 words fits well within this; it stops a rambling reply
+# from holding an inference slot, since each generated token costs a full decode step.
+_SCORE_MAX_TOKENS = 256
+_CONTEXT_SYS = (
+    "You are an expert resume evaluator and editor. You will be given a candidate's resume and a job description, "
+    "followed by the task to perform on them. Consider all aspects: skills, experience, qualifications, and "
+    "alignment with the role's responsibilities."
+)
+_TAILORING_TASK = (
+    "Evaluate the degree of resume tailoring for the job description above. Respond with only one of these words: "
+    "Exceptional, Very Well, Well, Moderate, Generic"
+)
+_EDITS_TASK = (
+    "Improve this resume's suitability for the job description above. Be critical and provide helpful suggestions "
+    "on how to improve the resume. End by stating how strong the fit is to the job description."
+)
+_ANALYSIS_TASK = (
+    "For the resume and job description above: 1. Score the resume's suitability from 0 (no fit) to 10 (perfect fit) "
+    "and give a short explanation. 2. List only the specific skills or experiences that are missing or could be "
+    "improved upon, as concise bullet points. 3. Suggest how to improve the resume, addressing the gaps you listed."
+)
+_GAPS_SYS = (
+    "You are an expert at identifying and articulating missing skills and experiences. "
+    "Your task is to analyze a rationale, describing aspects of a candidate's profile in relation to a job. "
+    "From these rationales, **extract only the specific skills or experiences that are identified as missing or could be improved upon** "
+    "for a higher suitability score. Provide your response as a concise list of bullet points, "
+    "with each point clearly stating a missing skill or experience. "
+    "Do not include any introductory or concluding remarks, just the bullet points."
+)
+
+
+def _build_client() -> AsyncClient:
+    """
+    Builds the Ollama client for the running event loop.
+
+    One client serves the whole loop so every call reuses the pooled keep-alive connections to the server.
+    The host comes from OLLAMA_HOST. Local generation can be slow, but a server that isn't up should fail fast.
+    """
+    return AsyncClient(timeout=httpx.Timeout(120.0, connect=5.0),
+                       limits=httpx.Limits(max_connections=OLLAMA_NUM_PARALLEL,
+                                           max_keepalive_connections=OLLAMA_NUM_PARALLEL))
+
+
+_clients = LoopLocal(_build_client)
+
+
+def get_client() -> AsyncClient:
+    """Returns the Ollama client of the running event loop, building it on first use."""
+    return _clients.get()
+
+
+async def close_client() -> None:
+    """Closes the running loop's pooled connections, if its client was ever built. Call before the loop ends."""
+    client = _clients.pop()
+    if client is not None:
+        await client.close()
+
+
+@lru_cache(maxsize=None)
+def _schema(response_format: type[BaseModel]) -> dict:
+    """The JSON schema Ollama constrains the reply to, built once per model class."""
+    return response_format.model_json_schema()
+
+
+@lru_cache(maxsize=32)
+def _canonicalize(text: str) -> str:
+    """
+    Collapses runs of whitespace, which only cost prompt tokens, and truncates to MAX_INPUT_TOKENS.
+
+    Cached since the same resume is sent with every posting.
+    """
+    text = re.sub(r"\s+", " ", text).strip()
+    max_chars = MAX_INPUT_TOKENS * _CHARS_PER_TOKEN
+    if len(text) > max_chars:
+        logger.debug("Truncating input from %d to %d characters", len(text), max_chars)
+        text = text[:max_chars].rsplit(" ", 1)[0]
+    return text
+
+
+async def _wait_for_rate_limit() -> None:
+    """Spaces request starts evenly at OLLAMA_RATE_LIMIT_PER_MINUTE, so a large gather doesn't burst the server."""
+    global _next_request_at
+    if not OLLAMA_RATE_LIMIT_PER_MINUTE:
+        return
+    now = asyncio.get_running_loop().time()
+    # Claim the next start slot before sleeping so concurrent callers queue up behind each other
+    start_at = max(now, _next_request_at)
+    _next_request_at = start_at + 60 / OLLAMA_RATE_LIMIT_PER_MINUTE
+    if start_at > now:
+        await asyncio.sleep(start_at - now)
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """
+    Whether an Ollama error is worth retrying: connect/write timeouts, dropped connections and 5xx
+    (e.g. a model still loading).
+
+    Read timeouts are not retried: the server is still generating the abandoned reply, so sending
+    the request again would only queue a second copy behind it.
+    """
+    if isinstance(exc, httpx.ReadTimeout):
+        return False
+    return (isinstance(exc, (httpx.TransportError, ConnectionError))
+            or (isinstance(exc, ResponseError) and exc.status_code >= 500))
+
+
+_retry_transient = retry_transient(_is_transient, logger, attempts=3, max_wait=10)
+
+
+def _chat_args(options: Optional[dict]) -> dict:
+    """Arguments every chat request carries, so all of them hit the same loaded model and prompt cache."""
+    return {"model": model, "options": {"num_ctx": OLLAMA_NUM_CTX, **(options or {})}, "keep_alive": OLLAMA_KEEP_ALIVE}
+
+
+@_retry_transient
+async def _chat(options: Optional[dict] = None, **kwargs):
+    await _wait_for_rate_limit()
+    async with _request_slots.get():
+        return await get_client().chat(**_chat_args(options), **kwargs)
+
+
+# Extra requests made to fix a structured reply that fails validation
+_REPAIR_ATTEMPTS = 1
+
+
+async def _structured_chat(response_format: type[T], system_prompt: str, user_prompt: str,
+                           temperature: Optional[float] = None, max_tokens: Optional[int] = None) -> T:
+    """
+    Asks the model for a reply matching response_format, reusing the stored reply for an identical prompt.
+
+    Replies are kept in the on-disk LLM cache, keyed by model and prompt, so re-scoring the same
+    resume against the same posting in a later run skips the model entirely. A reply that doesn't
+    validate is sent back once for repair before the ValidationError is raised, and only valid
+    replies are cached.
+    """
+    cache_key = llm_cache.make_key(model, temperature, response_format.__name__, system_prompt, user_prompt)
+    cached = llm_cache.get_cached(cache_key)
+    if cached is not None:
+        return response_format.model_validate_json(cached)
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+    options = {key: value for key, value in (("temperature", temperature), ("num_predict", max_tokens))
+               if value is not None}
+    for attempt in range(_REPAIR_ATTEMPTS + 1):
+        response = await _chat(messages=messages, options=options, format=_schema(response_format))
+        content = response.message.content
+        try:
+            result = response_format.model_validate_json(content)
+            break
+        except ValidationError as e:
+            if attempt == _REPAIR_ATTEMPTS:
+                logger.debug("Invalid %s reply: %s", response_format.__name__, content)
+                raise
+            # Small models sometimes break the schema (e.g. a truncated string); show them the
+            # error and let them fix their own reply rather than failing the whole comparison
+            logger.warning("Reply didn't match %s, asking the model to repair it", response_format.__name__)
+            messages = [*messages,
+                        {"role": "assistant", "content": content},
+                        {"role": "user", "content": f"That reply is not valid: {e}\n"
+                                                    "Reply again with only the corrected JSON."}]
+    llm_cache.store(cache_key, content)
+    return result
+
+
+async def check_request(prompt: str) -> ComparisonExtract:
     return ComparisonExtract(is_valid=True, confidence=0.9, rationale="PassThrough Value")
 
 
-def resume_summarizer(resume: str) -> ResumeDigest:
+async def extract_reqs(prompt: str) -> WorkflowReqs:
+    logger.info("Starting prompt extraction")
+    result = await _structured_chat(
+        WorkflowReqs,
+        "Extract whether the prompt includes requests for resume scoring, success calculation, "
+        "and/or edit suggestion. Synonyms for these requests may be provided (e.g., resume fit)",
+        prompt,
+        temperature=0,
+    )
+    logger.info("Extraction complete!")
+    return result
+
+
+async def check_and_extract_reqs(prompt: str) -> GateAndReqs:
+    """check_request is a passthrough on this backend, so only the extraction costs a model call."""
+    return GateAndReqs(gate=await check_request(prompt), reqs=await extract_reqs(prompt))
+
+
+async def resume_summarizer(resume: str) -> ResumeDigest:
     """
     Summarize a resume to extract key keep the important bits for the for loop analysis
 
@@ -26,7 +245,8 @@ def resume_summarizer(resume: str) -> ResumeDigest:
     the core qualifications, skills, and experience from the resume for downstream analysis.
     
     Leaving this in for reference, but it makes the results worse. Probably needs to be replaced with
-    a tokenization step or something.
+    a tokenization step or something. It only runs with ENABLE_RESUME_SUMMARIZER=1 set, so nothing
+    spends a model call on it by accident.
 
     Args:
         resume (str): The plain text content of the candidate's resume.
@@ -34,27 +254,21 @@ def resume_summarizer(resume: str) -> ResumeDigest:
     Returns:
         ResumeDigest: An object containing the summarized resume.
     """
+    if os.getenv("ENABLE_RESUME_SUMMARIZER") != "1":
+        raise NotImplementedError("resume_summarizer is disabled, set ENABLE_RESUME_SUMMARIZER=1 to use it")
     logger.info("Starting resume summarizer")
-    
 
-    completion = chat(
-        model=model,
-        messages=[
-            {
-                "role": "system",
-                "content": "Summarize the provided resume, extract the important key words and phrases.",
-            },
-            {"role": "user", "content": resume},
-        ],
-        format=ResumeDigest.model_json_schema(),
+    result = await _structured_chat(
+        ResumeDigest,
+        "Summarize the provided resume, extract the important key words and phrases.",
+        resume,
     )
-    result = ResumeDigest.model_validate_json(completion.message.content)
     logger.info("Summary complete!")
-    print(result.summary)
+    logger.debug("Resume summary: %s", result.summary)
     return result
 
 
-def score_resume(resume_text: str, job_description: str) -> JDScore:
+async def score_resume(resume_text: str, job_description: str) -> JDScore:
     """
     Evaluates the suitability of a resume for a specific job description.
 
@@ -71,39 +285,58 @@ def score_resume(resume_text: str, job_description: str) -> JDScore:
         JDScore: An object containing the suitability score and an explanation.
     """
 
-    system_prompt = (
-        "You are an expert resume evaluator. Your task is to score a resume's suitability "
-        "for a given job description on a scale of 0 to 10. "
-        "A score of 10 indicates a perfect fit, and 0 indicates no fit. "
-        "Be harsh but fair. "
-        "Consider all aspects: skills, experience, qualifications, and alignment with the role's responsibilities. "
-        "Provide the numerical score as an float and a short explanation (<100 words)."
-    )
-
-    user_prompt = (
-        f"Resume:\n---\n{resume_text}\n---\n\n"
-        f"Job Description:\n---\n{job_description}\n---\n\n"
-        "Score this resume against the job description (0-10)."
-    )
+    # The resume goes in the system message so every posting scored against it shares the same
+    # prefix, which the server can reuse from its prompt cache; only the job description differs.
+    system_prompt = f"{_SCORE_SYS}\n\nResume:\n{_canonicalize(resume_text)}"
+    user_prompt = f"Job Description:\n{_canonicalize(job_description)}"
     try:
-        response = chat(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            options={"temperature": 0},
-            format=JDScore.model_json_schema()
-        )
+        result = await _structured_chat(JDScore, system_prompt, user_prompt, temperature=0,
+                                        max_tokens=_SCORE_MAX_TOKENS)
         logger.info("Resume scoring successful!")
-        result = JDScore.model_validate_json(response.message.content)
     except Exception as e:
-        logger.error(f"Failed to score resume: {e}")
+        logger.error("Failed to score resume: %s", e)
         result = JDScore(score=-1, explanation="Comparison failed")
     return result
 
 
-def summarize_gaps(explanation: str) -> str:
+def _context_prompts(resume_text: str, job_description: str, task: str) -> tuple[str, str]:
+    """
+    Builds the (system, user) prompt pair for a task on a resume and a job description.
+
+    As in score_resume, the resume sits in the system message so it forms a shared prefix across postings.
+    """
+    return (f"{_CONTEXT_SYS}\n\nResume:\n{_canonicalize(resume_text)}",
+            f"Job Description:\n{_canonicalize(job_description)}\n\n{task}")
+
+
+async def extract_tailoring(resume_text: str, job_description: str) -> str:
+    logger.info("Starting tailoring extraction")
+    system_prompt, user_prompt = _context_prompts(resume_text, job_description, _TAILORING_TASK)
+    response = await _chat(
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        options={"temperature": 0},
+    )
+    logger.info("Extraction complete!")
+    return response.message.content.strip()
+
+
+def _gaps_prompts(explanations: Iterable[str]) -> tuple[str, str]:
+    """Builds the (system, user) prompt pair shared by summarize_gaps and summarize_gaps_stream."""
+    if isinstance(explanations, str):
+        explanations = (explanations,)
+    rationales = "\n--\n".join(f"Rationale: {explanation}" for explanation in explanations)
+    user_prompt = (
+        f"Analyze the following rationale to identify missing skills or experiences:\n"
+        f"{rationales}\n--\n\n"
+        "List the identified gaps:"
+    )
+    return _GAPS_SYS, user_prompt
+
+
+async def summarize_gaps(explanations: Iterable[str]) -> str:
     """
     Analyzes an explanation to extract missing skills or experiences.
 
@@ -113,34 +346,17 @@ def summarize_gaps(explanation: str) -> str:
     candidates understand what areas of their resume could be strengthened to better match job requirements.
 
     Args:
-        explanations (List[str]): List of rationale strings, each describing aspects of a candidate's profile
-                                  in relation to a job description.
+        explanations (Iterable[str]): Rationale strings, each describing aspects of a candidate's profile
+                                      in relation to a job description.
 
     Returns:
         str: A bullet-point list of missing skills or experiences, as identified by the LLM.
     """
     logger.info("Starting gap summarizer")
-    
-    explanation = f"Rationale: {explanation}"
-
-    system_prompt = (
-        "You are an expert at identifying and articulating missing skills and experiences."
-        "Your task is to analyze a rationale, describing aspects of a candidate's profile in relation to a job."
-        "From these rationales, **extract only the specific skills or experiences that are identified as missing or could be improved upon**"
-        "for a higher suitability score. Provide your response as a concise list of bullet points,"
-        "with each point clearly stating a missing skill or experience."
-        "Do not include any introductory or concluding remarks, just the bullet points."
-    )
+    system_prompt, user_prompt = _gaps_prompts(explanations)
 
-    user_prompt = (
-        f"Analyze the following rationale to identify missing skills or experiences:\n"
-        f"{'\n--\n'.join(explanation)}\n--\n\n"
-        "List the identified gaps:"
-    )
-    
     try:
-        response = chat(
-            model=model,
+        response = await _chat(
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
@@ -150,6 +366,77 @@ def summarize_gaps(explanation: str) -> str:
         logger.info("Gap summarizaton complete")
         result = response["message"]["content"]
     except Exception as e:
-        logger.error(f"Failed to identify gaps resume: {e}")
+        logger.error("Failed to identify gaps resume: %s", e)
         result = f"Unable to analyze gaps: {e}"
-    return result
\ No newline at end of file
+    return result
+
+
+async def summarize_gaps_stream(explanations: Iterable[str]) -> AsyncIterator[str]:
+    """
+    Streaming variant of summarize_gaps, yielding the bullet-point list as it is generated.
+
+    Args:
+        explanations (Iterable[str]): Rationale strings, each describing aspects of a candidate's profile
+                                      in relation to a job description.
+
+    Yields:
+        str: Successive chunks of the bullet-point list.
+    """
+    logger.info("Starting gap summarizer")
+    system_prompt, user_prompt = _gaps_prompts(explanations)
+    try:
+        await _wait_for_rate_limit()
+        # The slot is held until the stream ends, since the server is generating the whole time
+        async with _request_slots.get():
+            stream = await get_client().chat(
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                stream=True,
+                **_chat_args({"temperature": 0}),
+            )
+            async for chunk in stream:
+                yield chunk.message.content
+        logger.info("Gap summarizaton complete")
+    except Exception as e:
+        logger.error("Failed to identify gaps resume: %s", e)
+        yield f"Unable to analyze gaps: {e}"
+
+
+async def suggest_edits(resume_text: str, job_description: str, gaps: Optional[str]) -> ResumeSuggestions:
+    task = _EDITS_TASK
+    if gaps:
+        task = f"A separate analysis indicated these gaps: \n---\n{gaps}\n---\n\n{task}"
+    system_prompt, user_prompt = _context_prompts(resume_text, job_description, task)
+    try:
+        result = await _structured_chat(ResumeSuggestions, system_prompt, user_prompt, temperature=0)
+        logger.info("Resume edit suggestions request successful!")
+    except Exception as e:
+        logger.error("Failed to suggest resume edits: %s", e)
+        result = ResumeSuggestions(suggestions="Comparison failed")
+    return result
+
+
+async def analyze_resume(resume_text: str, job_description: str) -> FullAnalysis:
+    """
+    Scores a resume, summarizes its gaps and suggests edits in a single LLM request.
+
+    Args:
+        resume_text (str): The plain text content of the candidate's resume.
+        job_description (str): The plain text content of the job description.
+
+    Returns:
+        FullAnalysis: The suitability score, the identified gaps and the edit suggestions.
+    """
+    system_prompt, user_prompt = _context_prompts(resume_text, job_description, _ANALYSIS_TASK)
+    try:
+        result = await _structured_chat(FullAnalysis, system_prompt, user_prompt, temperature=0)
+        logger.info("Resume analysis successful!")
+    except Exception as e:
+        logger.error("Failed to analyze resume: %s", e)
+        result = FullAnalysis(
+            score=JDScore(score=-1, explanation="Comparison failed"),
+            gaps=f"Unable to analyze gaps: {e}",
+            suggestions=ResumeSuggestions(suggestions="Comparison failed"))
+    return result
@@ -1,33 +1,56 @@
 import logging
+import os
+from typing import Optional
 
 
 from app.config import AI_BACKEND
-if AI_BACKEND == "openai":
-    from .oa_models import check_request, extract_reqs, extract_tailoring
-elif AI_BACKEND == "ollama":
-    from .ollama_models import check_request  # , extract_reqs
-else:
-    raise ValueError(
-        f"Unknown AI_BACKEND: {AI_BACKEND}. Must be 'ollama' or 'openai'.")
 from app.datamodels.models import WorkflowReqs
+from app.scoring.backends import get_backend
 
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
 logger = logging.getLogger(__name__)
 
+# Run the gate check and the extraction as two requests, e.g. to see which of them misbehaves
+SPLIT_GATE_CHECK = os.getenv("SPLIT_GATE_CHECK") == "1"
 
-def check_and_extract(prompt: str) -> WorkflowReqs:
 
-    is_comparison_request = check_request(prompt)
-    print(is_comparison_request)
+class InvalidRequestError(ValueError):
+    """Raised when the prompt doesn't pass the gate check for a resume/job comparison request."""
+
+
+async def check_and_extract(prompt: str, backend: Optional[str] = None) -> WorkflowReqs:
+    """
+    Checks that the prompt asks for a resume/job comparison and extracts the requested workflow steps.
+
+    Both are answered by a single LLM request unless SPLIT_GATE_CHECK=1 is set.
+
+    Args:
+        prompt (str): The user's prompt.
+        backend (Optional[str]): AI backend to run the checks on. Defaults to AI_BACKEND.
+
+    Returns:
+        WorkflowReqs: The workflow steps the prompt asks for.
+
+    Raises:
+        InvalidRequestError: If the gate check rejects the prompt.
+    """
+    models = get_backend(backend or AI_BACKEND)
+    if SPLIT_GATE_CHECK:
+        is_comparison_request = await models.check_request(prompt)
+        request_values = None
+    else:
+        gate_and_reqs = await models.check_and_extract_reqs(prompt)
+        is_comparison_request, request_values = gate_and_reqs.gate, gate_and_reqs.reqs
+    logger.debug("Gate check result: %s", is_comparison_request)
     if not is_comparison_request.is_valid or is_comparison_request.confidence < 0.7:
-        logger.warning(
-            f"Gate check failed, this is not a valid request. {is_comparison_request.model_dump()}. Exiting")
-        exit(1)
-    request_values = extract_reqs(prompt)
-    print(request_values)
+        logger.warning("Gate check failed, this is not a valid request. %s", is_comparison_request.rationale)
+        raise InvalidRequestError(is_comparison_request.model_dump())
+    if request_values is None:
+        request_values = await models.extract_reqs(prompt)
+    logger.debug("Requested workflow steps: %s", request_values)
     return request_values
+
+
+async def extract_tailoring(resume_text: str, job_description: str, backend: Optional[str] = None) -> str:
+    """Asks the backend (AI_BACKEND by default) how well the resume is tailored to the job description."""
+    return await get_backend(backend or AI_BACKEND).extract_tailoring(resume_text, job_description)
@@ -0,0 +1,29 @@
+import logging
+from typing import Callable
+
+from tenacity import before_sleep_log, retry, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+
+def retry_transient(is_transient: Callable[[BaseException], bool], logger: logging.Logger,
+                    attempts: int = 5, max_wait: float = 30):
+    """
+    Builds the retry policy for LLM requests of a backend.
+
+    Backs off with jitter on the errors is_transient accepts, then re-raises the last one for the caller to handle.
+
+    Args:
+        is_transient (Callable[[BaseException], bool]): Whether an error of the backend is worth retrying.
+        logger (logging.Logger): Logger of the calling module, warned before each retry.
+        attempts (int, optional): Total attempts, including the first. Defaults to 5.
+        max_wait (float, optional): Upper bound in seconds for the wait between attempts. Defaults to 30.
+
+    Returns:
+        A decorator applying the policy to a function or coroutine.
+    """
+    return retry(
+        retry=retry_if_exception(is_transient),
+        wait=wait_random_exponential(min=1, max=max_wait),
+        stop=stop_after_attempt(attempts),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        reraise=True,
+    )
@@ -0,0 +1,113 @@
+import logging
+import os
+from typing import Optional
+
+import orjson
+
+from app.config import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE") == "1"
+SEMANTIC_CACHE_DIR = CACHE_DIR / "semantic_cache"
+SIMILARITY_THRESHOLD = 0.97
+# Only the newest entries of each cache are kept, so lookups and memory stay bounded
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2000"))
+
+
+class SemanticCache:
+    """
+    A nearest-neighbour cache of LLM responses keyed by prompt embeddings.
+
+    Slightly reworded resumes or job descriptions produce near-identical embeddings, so a
+    stored response is reused when the cosine similarity to a previous prompt is above the
+    threshold. Vectors are kept L2-normalized in one numpy matrix, so a lookup is a single
+    matrix-vector product.
+
+    Entries are appended to a JSON Lines file. Only the newest max_entries are kept: older ones are
+    dropped from memory straight away and from the file whenever it grows to twice that size.
+
+    Args:
+        namespace (str): Name of the cached task, used as the file name on disk.
+        threshold (float, optional): Minimum cosine similarity for a hit. Defaults to 0.97.
+        max_entries (int, optional): Number of entries to keep. Defaults to SEMANTIC_CACHE_MAX_ENTRIES.
+    """
+
+    def __init__(self, namespace: str, threshold: float = SIMILARITY_THRESHOLD,
+                 max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES):
+        self.path = SEMANTIC_CACHE_DIR / f"{namespace}.jsonl"
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._vectors = None  # numpy.ndarray of shape (entries, dimensions), loaded on first use
+        self._values: list[str] = []
+        self._lines_on_disk = 0
+
+    def _load(self) -> None:
+        if self._vectors is not None:
+            return
+        import numpy as np
+        vectors, values = [], []
+        if self.path.exists():
+            for line in self.path.read_bytes().splitlines():
+                try:
+                    entry = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    # A line cut short by an interrupted write only costs that one entry
+                    logger.warning("Skipping unreadable entry in %s", self.path)
+                    continue
+                vectors.append(entry["vector"])
+                values.append(entry["value"])
+                self._lines_on_disk += 1
+        self._vectors = np.array(vectors[-self.max_entries:], dtype=np.float32)
+        self._values = values[-self.max_entries:]
+        if self._lines_on_disk > 2 * self.max_entries:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrites the file with only the entries kept in memory."""
+        SEMANTIC_CACHE_DIR.mkdir(exist_ok=True)
+        self.path.write_bytes(b"".join(orjson.dumps({"vector": vector, "value": value},
+                                                    option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY)
+                                       for vector, value in zip(self._vectors, self._values)))
+        self._lines_on_disk = len(self._values)
+
+    def lookup(self, vector: list[float]) -> Optional[str]:
+        """
+        Finds the stored response whose prompt embedding is closest to the given one.
+
+        Args:
+            vector (list[float]): Embedding of the incoming prompt.
+
+        Returns:
+            Optional[str]: The stored response if the best match clears the threshold, else None.
+        """
+        self._load()
+        if not self._values:
+            return None
+        import numpy as np
+        query = np.asarray(vector, dtype=np.float32)
+        similarities = self._vectors @ (query / (np.linalg.norm(query) or 1.0))
+        best = int(similarities.argmax())
+        if similarities[best] < self.threshold:
+            return None
+        logger.info(
+            "Semantic cache hit for %s (similarity %.3f)", self.path.stem, similarities[best])
+        return self._values[best]
+
+    def add(self, vector: list[float], value: str) -> None:
+        """Stores a response under the embedding of the prompt that produced it."""
+        self._load()
+        import numpy as np
+        row = np.asarray(vector, dtype=np.float32)
+        row /= np.linalg.norm(row) or 1.0
+        stored = self._vectors if len(self._values) else self._vectors.reshape(0, len(row))
+        self._vectors = np.vstack((stored, row))[-self.max_entries:]
+        self._values = (self._values + [value])[-self.max_entries:]
+        if self._lines_on_disk >= 2 * self.max_entries:
+            self._compact()
+            return
+        SEMANTIC_CACHE_DIR.mkdir(exist_ok=True)
+        with self.path.open("ab") as file:
+            file.write(orjson.dumps({"vector": row, "value": value},
+                                    option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY))
+        self._lines_on_disk += 1
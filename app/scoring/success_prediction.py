@@ -1,3 +1,19 @@
+from bisect import bisect_left
+
+# Upper bound (inclusive) in days of each posting age bracket, and the decay factor for each bracket.
+# 2 weeks, 4 weeks, 8 weeks, 12 weeks; anything older falls into the last bracket.
+_DECAY_THRESHOLDS = (14, 28, 56, 84)
+_DECAY_FACTORS = (1.0, 0.8, 0.5, 0.2, 0.1)
+
+# Points added to the raw fit for each tailoring level; unknown levels get no boost.
+_TAILORING_BOOSTS = {
+    "Exceptional": 10,
+    "Very Well": 7,
+    "Well": 4,
+    "Moderate": 1,
+    "Generic": -5
+}
+
 
 def calculate_overall_fit_and_tailoring_score(raw_fit_percentage: float, tailoring_level: str) -> float:
     """
@@ -19,19 +35,28 @@ def calculate_overall_fit_and_tailoring_score(raw_fit_percentage: float, tailori
     Returns:
         float: The combined overall fit and tailoring score (0-100%).
     """
-    tailoring_boost_points = {
-        "Exceptional": 10,
-        "Very Well": 7,
-        "Well": 4,
-        "Moderate": 1,
-        "Generic": -5
-    }
+    initial_score = raw_fit_percentage + _TAILORING_BOOSTS.get(tailoring_level, 0)
+    # Plain comparisons rather than max(0, min(...)), which costs two builtin calls per score
+    return 0 if initial_score < 0 else (100 if initial_score > 100 else initial_score)
 
-    initial_score = raw_fit_percentage + \
-        tailoring_boost_points.get(tailoring_level, 0)
-    overall_score = max(0, min(initial_score, 100))
 
-    return overall_score
+def calculate_overall_fit_and_tailoring_score_vec(raw_fit_percentages, tailoring_levels):
+    """
+    Vectorized calculate_overall_fit_and_tailoring_score for scoring many job postings at once.
+
+    Args:
+        raw_fit_percentages (array-like of float): Each candidate's match to the job description (0-100%).
+        tailoring_levels (array-like of str): The tailoring level of each application, see
+                                              calculate_overall_fit_and_tailoring_score.
+
+    Returns:
+        numpy.ndarray: The combined overall fit and tailoring score for each posting (0-100%).
+    """
+    import numpy as np
+    # Only the handful of distinct levels are looked up in Python, the rest is array indexing
+    levels, level_index = np.unique(np.asarray(tailoring_levels, dtype=str), return_inverse=True)
+    boosts = np.array([_TAILORING_BOOSTS.get(level, 0) for level in levels.tolist()])[level_index]
+    return np.clip(np.asarray(raw_fit_percentages, dtype=float) + boosts, 0, 100)
 
 
 def calculate_time_decay(days_since_posted: int) -> float:
@@ -47,16 +72,40 @@ def calculate_time_decay(days_since_posted: int) -> float:
     Returns:
         float: A decay factor between 0.0 and 1.0.
     """
-    if days_since_posted <= 14:  # First 2 weeks
-        return 1.0
-    elif days_since_posted <= 28:  # 2 to 4 weeks
-        return 0.8
-    elif days_since_posted <= 56:  # 4 to 8 weeks
-        return 0.5
-    elif days_since_posted <= 84:  # 8 to 12 weeks
-        return 0.2
-    else:
-        return 0.1
+    # The bounds are inclusive, so a posting exactly on a threshold stays in the earlier bracket
+    return _DECAY_FACTORS[bisect_left(_DECAY_THRESHOLDS, days_since_posted)]
+
+
+def calculate_time_decay_vec(days_since_posted):
+    """
+    Vectorized calculate_time_decay for scoring many job postings at once.
+
+    Args:
+        days_since_posted (array-like of int): The number of days since each job was posted.
+
+    Returns:
+        numpy.ndarray: The decay factor for each posting, between 0.0 and 1.0.
+    """
+    import numpy as np
+    brackets = np.searchsorted(_DECAY_THRESHOLDS, days_since_posted, side="left")
+    return np.asarray(_DECAY_FACTORS)[brackets]
+
+
+def calculate_time_decay_from_dates(dates_posted, today=None):
+    """
+    Vectorized time decay for postings given by the date they were posted.
+
+    Args:
+        dates_posted (array-like of date or str): The date each job was posted, as dates or ISO strings.
+        today (date, optional): The date to measure posting age from. Defaults to the current date.
+
+    Returns:
+        numpy.ndarray: The decay factor for each posting, between 0.0 and 1.0.
+    """
+    import numpy as np
+    today = np.datetime64(today, "D") if today is not None else np.datetime64("today", "D")
+    days_since_posted = (today - np.asarray(dates_posted, dtype="datetime64[D]")).astype(np.int64)
+    return calculate_time_decay_vec(days_since_posted)
 
 
 def calculate_interview_chance(raw_fit_percentage: float, tailoring_level: str, days_since_posted=0) -> float:
@@ -1,70 +1,77 @@
 import argparse
+import asyncio
 from datetime import datetime, timezone
-import json
 import logging
 from pathlib import Path
 from pprint import pprint
+from typing import AsyncIterator
 
+import orjson
+
+from app.config import AI_BACKEND, CACHE_DIR
 from app.datamodels.models import JobInfo
-from app.scoring.prompt_extraction import check_and_extract, extract_tailoring
-from app.scoring.job_posts import score_resume, summarize_gaps, suggest_edits
+from app.logging_config import setup_logging
 from app.scoring.success_prediction import calculate_interview_chance
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
 logger = logging.getLogger(__name__)
 
-CACHE_DIR = Path.cwd() / "data"
-CACHE_DIR.mkdir(exist_ok=True)
-
 
 def cache_data(score: JobInfo, gap_summary: str) -> None:
     """
-    Saves all data to a cache file.
+    Appends all data to the day's cache file.
     Args:
         scores (List[JobInfo]): List of JobInfo objects containing job details and scores.
         gap_summary (str): Summary of areas where the resume could be improved.
     Side Effects:
-        - Saves all job scores and details to a timestamped JSON file in the cache directory.
+        - Appends the job score and details as one JSON line to a per-day JSONL file in the cache directory.
 
     """
-    dt_string = datetime.now(timezone.utc).strftime(format="%Y%m%d-%H%M%S")
-    outfile = CACHE_DIR / f"jobs_{dt_string}.json"
-    logger.info(f"Saving data to {outfile}")
+    now = datetime.now(timezone.utc)
+    dt_string = now.strftime(format="%Y%m%d-%H%M%S")
+    outfile = CACHE_DIR / f"jobs_{now.strftime(format='%Y%m%d')}.jsonl"
+    logger.info("Saving data to %s", outfile)
     jobs_d = {
         "query_date": dt_string,
-        "job": score.model_dump(),
+        "job": score.model_dump(mode="json"),
         "areas_of_improvement": gap_summary
     }
-    with open(outfile, "w") as f:
-        json.dump(jobs_d, f, indent=4)
+    with open(outfile, "ab") as f:
+        f.write(orjson.dumps(jobs_d, option=orjson.OPT_APPEND_NEWLINE))
 
 
-def display_output(score: JobInfo, gap_summary: str) -> None:
+async def display_output(score: JobInfo, gap_summary: str | AsyncIterator[str]) -> str:
     """
     Displays the top job matches and areas for improvement
 
     Args:
         scores (List[JobInfo]): List of JobInfo objects containing job details and scores.
-        gap_summary (str): Summary of areas where the resume could be improved.
-        top_n (int, optional): Number of top jobs to display. Defaults to 5.
+        gap_summary (str | AsyncIterator[str]): Summary of areas where the resume could be improved,
+                                                either complete or as a stream of chunks.
+
+    Returns:
+        str: The full gap summary.
 
     Side Effects:
         - Prints the top N job matches and their explanations to the console.
-        - Prints the gap summary to the console.
+        - Prints the gap summary to the console, chunk by chunk as it is streamed in.
     """
     print("")
     print(score.score)
     print(score.explanation)
     print("")
     print("Areas of improvement")
-    print(gap_summary)
+    if isinstance(gap_summary, str):
+        print(gap_summary)
+        return gap_summary
+    chunks = []
+    async for chunk in gap_summary:
+        chunks.append(chunk)
+        print(chunk, end="", flush=True)
+    print("")
+    return "".join(chunks)
 
 
-def run_workflow(resume: str, job_posting: str, prompt: str) -> None:
+async def run_workflow(resume: str, job_posting: str, prompt: str) -> None:
     """
     Executes the main workflow for job searching and evaluation.
 
@@ -72,6 +79,10 @@ def run_workflow(resume: str, job_posting: str, prompt: str) -> None:
         1. Take a job posting and a resume, evaluates against it.
         2. Provides suggestions on where to strengthen said resume
 
+    LLM requests that don't depend on each other are started as tasks up front so
+    their round-trips overlap instead of running back to back. The resume is scored
+    at most once, and that score is shared by the display, caching and prediction steps.
+
     Args:
         resume (str): The contents of the user's resume in plain text.
         job_posting (str): The text of a job posting
@@ -80,24 +91,61 @@ def run_workflow(resume: str, job_posting: str, prompt: str) -> None:
         None
     """\
 
-    request_values = check_and_extract(prompt)
-    gap_summary = ""
-    if request_values.score_resume:
-        score = score_resume(resume, job_posting)
-        gap_summary = summarize_gaps(score)
-        display_output(score, gap_summary)
-        cache_data(score, gap_summary)
-    if request_values.predict_success:
-        if not request_values.score_resume:
-            score = score_resume(resume, job_posting)
-        tailoring_level = extract_tailoring(resume, job_posting)
-        success_probability = calculate_interview_chance(
-            score.score * 10, tailoring_level)
-        print(
-            f"Given a score of {score.score} and your resume that is {tailoring_level} tailored. Your probability of success is: {success_probability}%")
-    if request_values.suggest_edits:
-        edits = suggest_edits(resume, job_posting, gap_summary)
-        pprint(edits.suggestions)
+    # Imported here so that argument parsing (and --help) doesn't pay for the LLM client stack
+    from app.scoring.backends import get_backend
+    from app.scoring.prompt_extraction import check_and_extract, extract_tailoring
+    models = get_backend(AI_BACKEND)
+
+    try:
+        request_values = await check_and_extract(prompt)
+        analysis_task = None
+        score_task = None
+        if request_values.score_resume and request_values.suggest_edits:
+            # Score, gaps and edits all share the resume/JD context, so ask for them in one request
+            analysis_task = asyncio.create_task(
+                models.analyze_resume(resume, job_posting))
+        elif request_values.score_resume or request_values.predict_success:
+            score_task = asyncio.create_task(models.score_resume(resume, job_posting))
+        tailoring_task = None
+        if request_values.predict_success:
+            tailoring_task = asyncio.create_task(
+                extract_tailoring(resume, job_posting))
+        edit_task = None
+        if request_values.suggest_edits and not request_values.score_resume:
+            # No gap summary will be produced, so edits don't need to wait on scoring
+            edit_task = asyncio.create_task(
+                models.suggest_edits(resume, job_posting, None))
+
+        # The resume is scored at most once per workflow; every branch below reuses `score`
+        score = None
+        gap_summary = ""
+        edits = None
+        if analysis_task is not None:
+            analysis = await analysis_task
+            score, gap_summary, edits = analysis.score, analysis.gaps, analysis.suggestions
+        elif score_task is not None:
+            score = await score_task
+
+        if request_values.score_resume:
+            if analysis_task is None:
+                # Stream the gaps so they print from the first token instead of after the full reply
+                gap_summary = await display_output(score, models.summarize_gaps_stream([score.explanation]))
+            else:
+                await display_output(score, gap_summary)
+            cache_data(score, gap_summary)
+        if request_values.predict_success:
+            tailoring_level = await tailoring_task
+            success_probability = calculate_interview_chance(
+                score.score * 10, tailoring_level)
+            print(
+                f"Given a score of {score.score} and your resume that is {tailoring_level} tailored. Your probability of success is: {success_probability}%")
+        if edit_task is not None:
+            edits = await edit_task
+        if edits is not None:
+            pprint(edits.suggestions)
+    finally:
+        # Also on a rejected prompt or a failed step, so the pooled connections are never left open
+        await models.close_client()
     logger.info("Script complete")
 
 
@@ -107,7 +155,7 @@ def extract_txt_file(fpath: Path) -> str:
         with open(fpath) as f:
             content = f.read()
     except Exception as e:
-        logger.error(f"Unable to extract content from {fpath}! {e}")
+        logger.error("Unable to extract content from %s! %s", fpath, e)
     return content
 
 
@@ -122,14 +170,21 @@ if __name__ == "__main__":
                         help="The LLM prompt", required=True)
     args = parser.parse_args()
 
-    logger.info(f"Reading resume from {args.resume_path}")
+    setup_logging()
+    logger.info("Using AI backend: %s", AI_BACKEND)
+    logger.info("Reading resume from %s", args.resume_path)
     resume = extract_txt_file(args.resume_path)
     if not resume:
         logger.info("Exiting")
         exit(1)
-    logger.info(f"Reading job posting from {args.job_posting}")
+    logger.info("Reading job posting from %s", args.job_posting)
     job_posting = extract_txt_file(args.job_posting)
     if not job_posting:
-        logging.info("Exiting")
+        logger.info("Exiting")
+        exit(1)
+    from app.scoring.prompt_extraction import InvalidRequestError
+    try:
+        asyncio.run(run_workflow(resume, job_posting, args.prompt))
+    except InvalidRequestError:
+        logger.info("Exiting")
         exit(1)
-    run_workflow(resume, job_posting, args.prompt)
@@ -0,0 +1,70 @@
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import pytest
+
+from app.datamodels.models import JobInfo
+from app.scoring import job_posts, llm_cache, oa_models, ollama_models
+
+SCORE = json.dumps({"score": 7, "explanation": "Good fit"})
+
+
+class FakeOpenAI:
+    """Stands in for AsyncOpenAI; every reply scores each job description in the request 7."""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, messages, **kwargs):
+        await asyncio.sleep(0.01)
+        count = messages[-1]["content"].count("Job Description [")
+        content = json.dumps({"scores": [json.loads(SCORE)] * count}) if count else SCORE
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+    async def close(self):
+        pass
+
+
+class FakeOllama:
+    """Stands in for ollama.AsyncClient."""
+
+    async def chat(self, **kwargs):
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(message=SimpleNamespace(content=SCORE))
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def no_llm_cache(monkeypatch):
+    monkeypatch.setattr(llm_cache, "get_cached", lambda key: None)
+    monkeypatch.setattr(llm_cache, "store", lambda key, value: None)
+
+
+@pytest.mark.parametrize("backend", ["openai", "ollama"])
+def test_score_job_posts_across_event_loops(monkeypatch, backend):
+    """Semaphores and clients must not stay bound to the event loop of the first run."""
+    monkeypatch.setattr(job_posts, "AI_BACKEND", backend)
+    monkeypatch.setattr(oa_models, "get_client", FakeOpenAI)
+    monkeypatch.setattr(ollama_models, "get_client", FakeOllama)
+    # More postings than request slots, each with its own resume, so the semaphore is contended
+    jobs = [JobInfo(description=f"Job {i}", resume=f"Resume {i}") for i in range(20)]
+
+    for _ in range(2):
+        scored = asyncio.run(job_posts.ascore_job_posts(jobs))
+        assert [job.score for job in scored] == [7] * len(jobs)
+
+
+def test_score_job_posts_is_sync(monkeypatch):
+    monkeypatch.setattr(job_posts, "AI_BACKEND", "openai")
+    monkeypatch.setattr(oa_models, "get_client", FakeOpenAI)
+    jobs = [JobInfo(description="Job", resume="Resume")] * 3
+
+    for _ in range(2):
+        scored = job_posts.score_job_posts(jobs)
+        assert [job.score for job in scored] == [7] * len(jobs)